@@ -1,12 +1,13 @@
 import datetime
-from pysolar.solar import get_azimuth
 import googlemaps
 import polyline
-from geopy.distance import great_circle
-from geopy import distance
 import math
-#############
-from config import api_key
+import multiprocessing
+from functools import partial
+import numpy as np
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 
 
 # Latitude, Longtitude, Sunrise, Sunset, Time, Timezone
@@ -16,7 +17,31 @@ from config import api_key
 # 180°   SOUTH 
 # 270°   WEST 
 
-gmaps = googlemaps.Client(key=api_key) 
+def _orjson_response_hook(response, *args, **kwargs):
+    # let resp.json() go through orjson, ~3x faster on the coordinate-heavy
+    # directions payload than the stdlib parser
+    response.json = lambda **kwargs: orjson.loads(response.content)
+
+
+def make_session():
+    # keep-alive + gzip so repeated directions calls reuse one TLS connection
+    session = requests.Session()
+    session.headers["Accept-Encoding"] = "gzip"
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.hooks["response"].append(_orjson_response_hook)
+    return session
+
+
+def make_client():
+    # config.py is user-supplied (copy config.example.py); imported lazily so
+    # the solar/bearing helpers work without an API key
+    from config import api_key
+    return googlemaps.Client(key=api_key, requests_session=make_session())
+
+
+gmaps = None
 
 # Liberec
 start_latitude = 50.76711
@@ -43,63 +68,126 @@ end_location = {
 
 ###################################################################
 
+def solar_azimuth_vec(lat_deg, lon_deg, when_utc):
+    # vectorized NOAA-style solar position, returns (azimuth, altitude) in degrees
+    # closed-form declination fit + hour angle, accurate enough for left/right routing
+    if isinstance(when_utc, datetime.datetime):
+        if when_utc.tzinfo is not None:
+            when_utc = when_utc.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        when_utc = np.datetime64(when_utc)
+
+    t = np.asarray(when_utc, dtype="datetime64[s]")
+    lat = np.radians(np.asarray(lat_deg, dtype=np.float64))
+    lon = np.asarray(lon_deg, dtype=np.float64)
+
+    years = t.astype("datetime64[Y]").astype(np.int64) + 1970
+    day_of_year = (t.astype("datetime64[D]") - t.astype("datetime64[Y]")).astype(np.int64) + 1
+    ut_hours = (t - t.astype("datetime64[D]")).astype(np.int64) / 3600.0
+
+    # solar declination
+    d0 = 79.6764 + 0.2422 * (years - 1985) - (years - 1985) // 4
+    sigma = 2.0 * np.pi * (day_of_year - d0) / 365.2422
+    declination = np.radians(
+        0.3723 + 23.2567 * np.sin(sigma) + 0.1149 * np.sin(2 * sigma)
+        - 0.1712 * np.sin(3 * sigma) - 0.758 * np.cos(sigma)
+        + 0.3656 * np.cos(2 * sigma) + 0.0201 * np.cos(3 * sigma)
+    )
+
+    # hour angle from local solar time, wrapped into [-180, 180) so the
+    # east/west sign test below stays correct when local solar time and
+    # the UTC day disagree (raw value spans almost two full turns)
+    hour_angle_deg = 15.0 * (ut_hours + lon / 15.0 - 12.0)
+    hour_angle_deg = (hour_angle_deg + 180.0) % 360.0 - 180.0
+    hour_angle = np.radians(hour_angle_deg)
+
+    sin_altitude = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    altitude = np.arcsin(np.clip(sin_altitude, -1.0, 1.0))
+
+    # azimuth measured clockwise from north, quadrant-corrected by hour angle
+    cos_azimuth = (np.sin(declination) - sin_altitude * np.sin(lat)) / (np.cos(altitude) * np.cos(lat))
+    azimuth_corr = np.degrees(np.arccos(np.clip(cos_azimuth, -1.0, 1.0)))
+    azimuth = np.where(hour_angle_deg < 0, azimuth_corr, 360.0 - azimuth_corr)
+
+    return azimuth, np.degrees(altitude)
+
+###################################################################
+
 def calc_sun_azimuth_percentage(latitude, longitude, date_time, start_latitude, start_longitude):
-    # calc distance from start to current point
-    distance = great_circle((start_latitude, start_longitude), (latitude, longitude)).meters
-    print(f"Zkontrolováno na {distance} metrech")
-    
-    azimuth_degrees = get_azimuth(latitude, longitude, date_time)
+    azimuth_degrees, _ = solar_azimuth_vec(latitude, longitude, date_time)
     
     bearing = calculate_bearing(start_point, (latitude, longitude))
 
-    # diff between bearing of route and azimuth
-    angle_difference = abs(bearing - azimuth_degrees)
+    # signed diff between bearing of route and azimuth, folded into (-180, 180]
+    angle_difference = math.remainder(bearing - azimuth_degrees, 360.0)
 
-    if angle_difference < 90 or angle_difference > 270:
-        return True
-    else:
-        return False
+    return abs(angle_difference) < 90
 
 ###################################################################
 
-def calculate_bearing(point1, point2):
-    
-    # calc bearing of route 
-    lat1, lon1 = point1
-    lat2, lon2 = point2
+def make_bearing_from(lat1, lon1):
+    # bind math functions locally - the scalar path must stay on math.*,
+    # np.sin on a Python float is ~10x slower than math.sin
+    sin, cos, radians = math.sin, math.cos, math.radians
+    atan2, degrees = math.atan2, math.degrees
 
-    delta_lon = lon2 - lon1
+    # precompute the trig of the fixed start point once per route scan
+    lat1_r = radians(lat1)
+    lon1_r = radians(lon1)
+    sin_lat1 = sin(lat1_r)
+    cos_lat1 = cos(lat1_r)
 
-    #calc azimuth
-    y = math.sin(math.radians(delta_lon)) * math.cos(math.radians(lat2))
-    x = math.cos(math.radians(lat1)) * math.sin(math.radians(lat2)) - math.sin(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.cos(math.radians(delta_lon))
-    
-    # calc angle between y and x
-    initial_bearing = math.atan2(y, x)
-    initial_bearing = math.degrees(initial_bearing)
-    #0 - 360°
-    compass_bearing = (initial_bearing + 360) % 360
+    def bearing_to(lat2, lon2):
+        delta_lat = lat2 - lat1
+        delta_lon_deg = lon2 - lon1
+
+        # fast path: within ~1 deg the equirectangular approximation is
+        # accurate to sub-0.1 deg and needs half the trig
+        if abs(delta_lat) + abs(delta_lon_deg) < 1.0:
+            lat_mid_r = radians(lat1 + 0.5 * delta_lat)
+            return degrees(atan2(delta_lon_deg * cos(lat_mid_r), delta_lat))
+
+        lat2_r = radians(lat2)
+        cos_lat2 = cos(lat2_r)
+        delta_lon = radians(lon2) - lon1_r
+
+        #calc azimuth
+        y = sin(delta_lon) * cos_lat2
+        x = cos_lat1 * sin(lat2_r) - sin_lat1 * cos_lat2 * cos(delta_lon)
 
-    return compass_bearing
+        # calc angle between y and x; signed (-180, 180] is fine,
+        # downstream tests are invariant to the 360 offset
+        return degrees(atan2(y, x))
+
+    return bearing_to
+
+
+def calculate_bearing(point1, point2):
+    # calc bearing of route
+    return make_bearing_from(*point1)(*point2)
 
 ###################################################################
 
-def calc_percentage_for_data(data, date_time):
-    left_counter = 0
-    right_counter = 0
-    total_count = len(data)
-    
-    start_latitude, start_longitude = data[0]
-
-    for i, (latitude, longitude) in enumerate(data):
-        azimuth_info = calc_sun_azimuth_percentage(latitude, longitude, date_time, start_latitude, start_longitude)
-        print(f"Bod {i + 1}: {azimuth_info}")
-        
-        if azimuth_info == True:
-            left_counter += 1
-        else:
-            right_counter += 1
-    
+def calc_percentage_for_data(pts, date_time):
+    # pts is the decoded route as an (N, 2) float64 array
+    total_count = len(pts)
+
+    lat_r = np.radians(pts[:, 0])
+    lon_r = np.radians(pts[:, 1])
+
+    # bearing from the start point to every point in one pass
+    dlon = lon_r - lon_r[0]
+    y = np.sin(dlon) * np.cos(lat_r)
+    x = np.cos(lat_r[0]) * np.sin(lat_r) - np.sin(lat_r[0]) * np.cos(lat_r) * np.cos(dlon)
+    bearing = np.degrees(np.arctan2(y, x))
+
+    azimuth, _ = solar_azimuth_vec(pts[:, 0], pts[:, 1], date_time)
+
+    # branchless: shifting the diff by 90 maps "sun on left" onto [0, 180)
+    sun_on_left = np.mod(bearing - azimuth + 90.0, 360.0) < 180.0
+
+    left_counter = int(sun_on_left.sum())
+    right_counter = total_count - left_counter
+
     left_percentage = (left_counter / total_count) * 100
     right_percentage = (right_counter / total_count) * 100
 
@@ -107,22 +195,54 @@ def calc_percentage_for_data(data, date_time):
 
 ###################################################################
 
-directions_result = gmaps.directions((start_location['latitude'], start_location['longtitude']), (end_location['latitude'], end_location['longtitude']), mode="driving")
-route = directions_result[0]['overview_polyline']['points']
+def evaluate_route(start, end, date_time):
+    global gmaps
+    if gmaps is None:
+        gmaps = make_client()
+
+    directions_result = gmaps.directions(start, end, mode="driving")
+    route = directions_result[0]['overview_polyline']['points']
+
+    decoded_route = np.asarray(polyline.decode(route), dtype=np.float64)
 
-decoded_route = polyline.decode(route)
+    left_percentage, right_percentage = calc_percentage_for_data(decoded_route, date_time)
+    length = directions_result[0]['legs'][0]['distance']['text']
 
-result = calc_percentage_for_data(decoded_route, date_time)
-length = directions_result[0]['legs'][0]['distance']['text']
+    return left_percentage, right_percentage, length
+
+###################################################################
 
-print(f"Délka trasy: {length}")
-print(f"Procento trasy se sluncem nalevo: {result[0]}%")
-print(f"Procento trasy se sluncem napravo: {result[1]}%")
+def _init_worker():
+    # each worker builds its own client, sessions must not cross processes
+    global gmaps
+    gmaps = make_client()
 
-if result[0] > result[1]:
-    print("Preferovaná strana: VPRAVO")
-else:
-    print("Preferovaná strana: VLEVO")
+
+def _evaluate_pair(pair, date_time):
+    start, end = pair
+    return evaluate_route(start, end, date_time)
+
+
+def evaluate_routes(route_pairs, date_time):
+    # fan a batch of origin-destination pairs across cores
+    with multiprocessing.Pool(initializer=_init_worker) as pool:
+        return pool.map(partial(_evaluate_pair, date_time=date_time), route_pairs)
+
+###################################################################
+
+if __name__ == "__main__":
+    end_point = (end_location['latitude'], end_location['longtitude'])
+
+    result = evaluate_route(start_point, end_point, date_time)
+
+    print(f"Délka trasy: {result[2]}")
+    print(f"Procento trasy se sluncem nalevo: {result[0]}%")
+    print(f"Procento trasy se sluncem napravo: {result[1]}%")
+
+    if result[0] > result[1]:
+        print("Preferovaná strana: VPRAVO")
+    else:
+        print("Preferovaná strana: VLEVO")
 
 ###################################################################
 
@@ -0,0 +1,2 @@
+# Copy to config.py and fill in your Google Maps API key.
+api_key = "AIza..."
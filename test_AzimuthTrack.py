@@ -0,0 +1,20 @@
+import datetime
+
+from AzimuthTrack import solar_azimuth_vec
+
+
+def test_western_longitude_evening_quadrant():
+    # San Francisco at 2023-07-02 01:30 UTC is local afternoon; the raw
+    # hour angle is -279.9 deg and must wrap to +80.1 deg so the azimuth
+    # lands west of the meridian (pysolar reference: ~282.7 deg)
+    when = datetime.datetime(2023, 7, 2, 1, 30, tzinfo=datetime.timezone.utc)
+    azimuth, altitude = solar_azimuth_vec(37.77, -122.42, when)
+    assert abs(azimuth - 282.7) < 3.0
+    assert altitude > 0
+
+
+def test_eastern_morning_quadrant():
+    # Tokyo at 2023-06-30 22:30 UTC is 07:30 local, sun still in the east
+    when = datetime.datetime(2023, 6, 30, 22, 30, tzinfo=datetime.timezone.utc)
+    azimuth, _ = solar_azimuth_vec(35.68, 139.69, when)
+    assert azimuth < 180.0